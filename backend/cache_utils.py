@@ -0,0 +1,28 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+class TTLCache:
+    """Single-value async memo for dashboard endpoints polled far more often than data changes."""
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Any = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        # the lock collapses concurrent misses into one query
+        async with self._lock:
+            now = time.monotonic()
+            if self._value is None or now - self._fetched_at > self.ttl:
+                self._value = await fetch()
+                self._fetched_at = now
+            return self._value
+
+    def invalidate(self):
+        self._fetched_at = 0.0
+
+_ttl = float(os.getenv("API_CACHE_TTL", "2"))
+stats_cache = TTLCache(_ttl)
+topics_cache = TTLCache(_ttl)
@@ -1,22 +1,107 @@
 import asyncio
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import trafilatura
 from langdetect import detect
+import gcld3
 import os
 import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import List, Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import ClassVar, List, Dict, Optional, Tuple
 import uuid
 import aiofiles
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, ParseResult
 import urllib.robotparser as robotparser
 import ipaddress
 import random
+import functools
+import sys
+from array import array
+import time
+import ahocorasick
+import logging
 from database import Database
 from logging_utils import log_manager
 
+# high-volume per-link events, only published when LOG_LEVEL=DEBUG
+DEBUG_EVENTS = frozenset({"fetch.backoff", "robots.disallow", "robots.meta-skip"})
+
+# restrict parsing to the tags we actually read
+A_ONLY = SoupStrainer('a', href=True)
+META_ONLY = SoupStrainer('meta', attrs={'name': 'robots'})
+
+# obvious non-HTML resources, skipped without issuing any request
+NON_HTML_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tgz", ".tar", ".iso", ".exe", ".dmg", ".deb", ".rpm",
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico",
+    ".mp3", ".mp4", ".webm", ".avi", ".mov", ".css", ".js", ".json", ".xml",
+)
+
+def _build_keyword_automaton(topics: Tuple[str, ...],
+                             mapping: Dict[str, Tuple[str, ...]]) -> ahocorasick.Automaton:
+    """Compile all topic keywords into one automaton mapping keyword -> topic ids"""
+    keyword_topics: Dict[str, List[int]] = {}
+    for topic_id, topic in enumerate(topics):
+        for keyword in mapping[topic]:
+            keyword_topics.setdefault(keyword, []).append(topic_id)
+    automaton = ahocorasick.Automaton()
+    for keyword, topic_ids in keyword_topics.items():
+        automaton.add_word(keyword, tuple(topic_ids))
+    automaton.make_automaton()
+    return automaton
+
+@functools.lru_cache(maxsize=4096)
+def _host_ok(host_l: str, base_netloc_l: str) -> bool:
+    """Reject local/private hosts and anything outside the base domain"""
+    if host_l in {"localhost", "127.0.0.1"} or host_l.endswith(".local"):
+        return False
+    try:
+        ip = ipaddress.ip_address(host_l)
+        if ip.is_private or ip.is_loopback:
+            return False
+    except ValueError:
+        # not an IP literal
+        pass
+    # same-domain (allow subdomains)
+    return host_l == base_netloc_l or host_l.endswith("." + base_netloc_l)
+
 class WebCrawler:
+    __slots__ = (
+        "db", "storage_path", "is_running", "current_task_id",
+        "user_agent", "delay_seconds", "timeout", "respect_robots",
+        "max_pages_per_site", "max_content_length", "concurrency", "site_concurrency",
+        "robots_ttl", "robots_max_bytes", "write_batch_bytes", "crawl_targets",
+        "_site_tasks", "_robots_cache", "_robots_cache_path", "_host_gates", "_host_next_time",
+        "_client", "_extract_pool", "extract_workers", "_pending_writes", "_pending_bytes", "_langid",
+        "_article_buffer", "_hash_buffer", "article_batch_size", "_flush_tasks",
+        "_pending_digests",
+    )
+
+    # Topic categories and keywords, shared by all instances
+    TOPIC_MAPPING: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        topic: tuple(sys.intern(k) for k in keywords)
+        for topic, keywords in {
+            "linux": ["linux", "ubuntu", "centos", "debian", "rhel", "bash", "shell"],
+            "networking": ["network", "tcp", "ip", "dns", "dhcp", "vpn", "firewall"],
+            "mysql": ["mysql", "mariadb", "database", "sql", "innodb"],
+            "apache": ["apache", "httpd", "mod_rewrite", "virtual host"],
+            "security": ["security", "ssl", "tls", "encryption", "vulnerability"],
+            "dns": ["dns", "bind", "nameserver", "domain", "zone"],
+            "vmware": ["vmware", "esxi", "vcenter", "virtualization"],
+            "cloud": ["aws", "azure", "gcp", "cloud", "ec2", "s3"],
+            "email": ["email", "postfix", "exim", "dovecot", "smtp"],
+            "web_troubleshooting": ["troubleshoot", "debug", "error", "performance"],
+            "vulnerabilities": ["cve", "exploit", "patch", "malware", "rootkit"]
+        }.items()
+    }
+    TOPICS: ClassVar[Tuple[str, ...]] = tuple(TOPIC_MAPPING)
+    _KEYWORD_AUTOMATON: ClassVar[ahocorasick.Automaton] = _build_keyword_automaton(TOPICS, TOPIC_MAPPING)
+
     def __init__(self):
         self.db = Database()
         self.storage_path = os.getenv("STORAGE_PATH", "/app/storage")
@@ -28,23 +113,35 @@ class WebCrawler:
         self.timeout = int(os.getenv("CRAWLER_TIMEOUT", "30"))
         self.respect_robots = os.getenv("CRAWLER_RESPECT_ROBOTS", "true").lower() == "true"
         self.max_pages_per_site = int(os.getenv("CRAWLER_MAX_PAGES", "50"))
-        self._robots_cache: Dict[str, robotparser.RobotFileParser] = {}
+        self.max_content_length = int(os.getenv("CRAWLER_MAX_CONTENT_LENGTH", "1000000"))
+        self.concurrency = int(os.getenv("CRAWLER_CONCURRENCY", "5"))
+        self.site_concurrency = int(os.getenv("CRAWLER_SITE_CONCURRENCY", "8"))
+        self._site_tasks: List[asyncio.Task] = []
+        self.robots_ttl = int(os.getenv("CRAWLER_ROBOTS_TTL", "21600"))
+        self.robots_max_bytes = 500_000
+        # netloc -> (parser, fetched_at, etag, last_modified, raw text)
+        self._robots_cache: Dict[str, Tuple[robotparser.RobotFileParser, float, str, str, str]] = {}
+        self._robots_cache_path = os.path.join(self.storage_path, "_robots_cache.json")
+        self._load_robots_cache()
+        self._host_gates: Dict[str, asyncio.Lock] = {}
+        self._host_next_time: Dict[str, float] = {}
         self._client: Optional[httpx.AsyncClient] = None
-        
-        # Topic categories and keywords
-        self.topic_mapping = {
-            "linux": ["linux", "ubuntu", "centos", "debian", "rhel", "bash", "shell"],
-            "networking": ["network", "tcp", "ip", "dns", "dhcp", "vpn", "firewall"],
-            "mysql": ["mysql", "mariadb", "database", "sql", "innodb"],
-            "apache": ["apache", "httpd", "mod_rewrite", "virtual host"],
-            "security": ["security", "ssl", "tls", "encryption", "vulnerability"],
-            "dns": ["dns", "bind", "nameserver", "domain", "zone"],
-            "vmware": ["vmware", "esxi", "vcenter", "virtualization"],
-            "cloud": ["aws", "azure", "gcp", "cloud", "ec2", "s3"],
-            "email": ["email", "postfix", "exim", "dovecot", "smtp"],
-            "web_troubleshooting": ["troubleshoot", "debug", "error", "performance"],
-            "vulnerabilities": ["cve", "exploit", "patch", "malware", "rootkit"]
-        }
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        # per crawler process; every Dramatiq worker process gets its own pool
+        self.extract_workers = int(os.getenv("CRAWLER_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+        # topic -> encoded NDJSON records awaiting a batched write
+        self._pending_writes: Dict[str, List[bytes]] = {}
+        self._pending_bytes: Dict[str, int] = {}
+        self.write_batch_bytes = 4 * 1024 * 1024
+        # (url, content, topic) rows and content hashes awaiting a bulk insert
+        self._article_buffer: List[Tuple[str, str, str]] = []
+        self._hash_buffer: List[bytes] = []
+        self.article_batch_size = int(os.getenv("CRAWLER_ARTICLE_BATCH", "50"))
+        # in-flight background batch inserts
+        self._flush_tasks: set = set()
+        # digests of pages being processed or awaiting insert, not yet in seen_hashes
+        self._pending_digests: set = set()
+        self._langid = gcld3.NNetLanguageIdentifier(min_num_bytes=100, max_num_bytes=2000)
         
         # Default crawl targets
         self.crawl_targets = [
@@ -59,14 +156,16 @@ class WebCrawler:
 
     async def get_status(self):
         """Get current crawler status"""
-        return {
-            "is_running": self.is_running,
-            "task_id": self.current_task_id,
-            "progress": await self._get_progress(),
-            "sites_crawled": await self._get_sites_crawled(),
-            "pages_found": await self._get_pages_found(),
-            "last_update": await self._get_last_update()
-        }
+        # one pooled connection for all four lookups
+        async with self.db.pool.acquire() as conn:
+            return {
+                "is_running": self.is_running,
+                "task_id": self.current_task_id,
+                "progress": await self._get_progress(conn),
+                "sites_crawled": await self._get_sites_crawled(conn),
+                "pages_found": await self._get_pages_found(conn),
+                "last_update": await self._get_last_update(conn)
+            }
 
     async def start_crawl(self):
         """Start a new crawl task"""
@@ -83,6 +182,8 @@ class WebCrawler:
     async def stop_crawl(self):
         """Stop the current crawl"""
         self.is_running = False
+        for t in self._site_tasks:
+            t.cancel()
         if self.current_task_id:
             await self.db.update_crawl_task(self.current_task_id, "stopped")
         self.current_task_id = None
@@ -95,21 +196,37 @@ class WebCrawler:
             client = await self._get_client()
 
             total = len(self.crawl_targets)
-            for i, target in enumerate(self.crawl_targets):
+            # each target is a separate host, so sites crawl in parallel;
+            # politeness delays are enforced per host inside _crawl_site
+            site_sem = asyncio.Semaphore(self.site_concurrency)
+
+            async def crawl_target(idx: int, target: str):
+                # stop_crawl cancels site tasks; that ends the site, not the crawl
+                try:
+                    async with site_sem:
+                        if not self.is_running:
+                            return
+                        await self._log("site.begin", url=target, idx=idx, total=total)
+                        await self._crawl_site(target)
+                except asyncio.CancelledError:
+                    return
+
+            self._site_tasks = [
+                asyncio.create_task(crawl_target(i + 1, target))
+                for i, target in enumerate(self.crawl_targets)
+            ]
+            done = 0
+            for fut in asyncio.as_completed(self._site_tasks):
+                await fut
                 if not self.is_running:
                     break
 
-                await self._log("site.begin", url=target, idx=i + 1, total=total)
-                await self._crawl_site(target)
-
                 # Update progress
-                progress = ((i + 1) / total) * 100
+                done += 1
+                progress = (done / total) * 100
                 await self.db.update_crawl_progress(task_id, progress)
                 await self._log("progress", value=progress)
 
-                # Small polite delay between sites
-                await asyncio.sleep(1.0)
-
             await self.db.update_crawl_task(task_id, "completed")
             await self._log("crawl.complete")
         except Exception as e:
@@ -118,36 +235,61 @@ class WebCrawler:
         finally:
             self.is_running = False
             self.current_task_id = None
+            for t in self._site_tasks:
+                t.cancel()
+            self._site_tasks = []
+            try:
+                await self._flush_articles()
+            except Exception:
+                pass
+            try:
+                await self._flush_writes()
+            except Exception:
+                pass
             # close client
             try:
                 if self._client:
                     await self._client.aclose()
             except Exception:
                 pass
+            self._client = None
+            if self._extract_pool:
+                self._extract_pool.shutdown(wait=False, cancel_futures=True)
+                self._extract_pool = None
+            try:
+                self._save_robots_cache()
+            except Exception:
+                pass
 
     async def _crawl_site(self, base_url: str):
         """Crawl a specific site (same-domain only) with robots compliance"""
         parsed = urlparse(base_url)
-        base_netloc = parsed.netloc
+        base_netloc_l = parsed.netloc.lower()
         rp = await self._get_robots(base_url)
         client = await self._get_client()
 
         # check base_url allowed
+        # site-level, so logged at INFO unlike the per-link robots.disallow
         if not self._allowed_by_robots(rp, base_url):
-            await self._log("robots.disallow", url=base_url)
+            await self._log("site.skip", url=base_url, reason="robots")
             return
 
         try:
-            resp = await client.get(base_url)
-            if resp.status_code >= 400:
-                await self._log("site.error", url=base_url, status=resp.status_code)
-                return
-            ctype = resp.headers.get("content-type", "")
-            if "text/html" not in ctype:
-                await self._log("site.skip", url=base_url, reason="non-html")
+            await self._wait_for_host(parsed.netloc, rp)
+            async with client.stream("GET", base_url) as resp:
+                if resp.status_code >= 400:
+                    await self._log("site.error", url=base_url, status=resp.status_code)
+                    return
+                ctype = resp.headers.get("content-type", "")
+                if "text/html" not in ctype:
+                    await self._log("site.skip", url=base_url, reason="non-html")
+                    return
+                listing_html = await self._read_body(resp)
+            if listing_html is None:
+                await self._log("site.skip", url=base_url, reason="too-large")
                 return
 
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            soup = BeautifulSoup(listing_html, 'lxml', parse_only=A_ONLY)
             links_set = set()
             for a in soup.find_all('a', href=True):
                 rel = a.get('rel') or []
@@ -156,94 +298,136 @@ class WebCrawler:
                     continue
                 href = a['href']
                 abs_url = urljoin(base_url, href)
-                if self._is_safe_url(abs_url, base_netloc):
+                if self._is_safe_url(abs_url, base_netloc_l):
                     links_set.add(abs_url)
 
             links = list(links_set)[: self.max_pages_per_site]
             await self._log("site.links", url=base_url, count=len(links))
 
-            sem = asyncio.Semaphore(5)
+            sem = asyncio.Semaphore(self.concurrency)
 
             async def process_link(link_url: str):
+                async with sem:
+                    await fetch_link(link_url)
+
+            async def fetch_link(link_url: str):
                 if not self.is_running:
                     return
                 if not self._allowed_by_robots(rp, link_url):
                     await self._log("robots.disallow", url=link_url)
                     return
-                await self._sleep_with_delay(rp)
-
+                link_parsed = urlparse(link_url)
+                if link_parsed.path.lower().endswith(NON_HTML_EXTENSIONS):
+                    await self._log("page.skip", url=link_url, reason="non-html")
+                    return
                 backoff = 1.0
+                status = None
                 for attempt in range(3):
+                    # every attempt, retries included, takes its own slot at the host
+                    await self._wait_for_host(link_parsed.netloc, rp)
                     try:
-                        r = await client.get(link_url)
-                        status = r.status_code
-                        if status == 429 or status == 403:
-                            await self._log("fetch.backoff", url=link_url, status=status, attempt=attempt+1)
-                            await asyncio.sleep(backoff)
+                        html = None
+                        retry_after = None
+                        async with client.stream("GET", link_url) as r:
+                            status = r.status_code
+                            if status in (429, 503):
+                                retry_after = r.headers.get("retry-after")
+                            else:
+                                # 403 is not retried: it usually means auth/blocking
+                                if status >= 400:
+                                    await self._log("fetch.error", url=link_url, status=status)
+                                    return
+                                # type/length guards before reading the body
+                                ctype = r.headers.get("content-type", "")
+                                if "text/html" not in ctype:
+                                    await self._log("page.skip", url=link_url, reason="non-html")
+                                    return
+                                clen = r.headers.get("content-length")
+                                if clen and int(clen) > self.max_content_length:
+                                    await self._log("page.skip", url=link_url, reason="too-large")
+                                    return
+                                html = await self._read_bytes(r)
+                                encoding = r.charset_encoding
+                                if html is None:
+                                    await self._log("page.skip", url=link_url, reason="too-large")
+                                    return
+                        if html is None:
+                            delay = self._retry_delay(retry_after, backoff)
+                            await self._log("fetch.backoff", url=link_url, status=status, attempt=attempt+1, delay=delay)
+                            # Retry-After speaks for the whole host: hold back every
+                            # request to it; the gate at the top of the loop waits it out
+                            self._defer_host(link_parsed.netloc, delay)
                             backoff *= 2
                             continue
-                        if status >= 400:
-                            await self._log("fetch.error", url=link_url, status=status)
-                            return
-                        # type/length guards
-                        ctype = r.headers.get("content-type", "")
-                        if "text/html" not in ctype:
-                            await self._log("page.skip", url=link_url, reason="non-html")
-                            return
-                        clen = r.headers.get("content-length")
-                        if clen and int(clen) > 1_000_000:
-                            await self._log("page.skip", url=link_url, reason="too-large")
-                            return
 
                         # meta robots noindex/nofollow
-                        psoup = BeautifulSoup(r.text, 'html.parser')
+                        psoup = BeautifulSoup(html, 'lxml', parse_only=META_ONLY, from_encoding=encoding)
                         meta = psoup.find('meta', attrs={'name': 'robots'})
+                        noindex = False
                         if meta and meta.get('content'):
                             content = meta['content'].lower()
-                            if 'noindex' in content or 'nofollow' in content:
-                                await self._log("robots.meta-skip", url=link_url)
-                                return
+                            noindex = 'noindex' in content or 'nofollow' in content
 
-                        await self._process_page(link_url, html=r.text)
+                        await self._process_page(link_url, html, noindex=noindex)
                         return
                     except Exception as e:
                         await self._log("fetch.exception", url=link_url, error=str(e), attempt=attempt+1)
                         await asyncio.sleep(backoff)
                         backoff *= 2
+                await self._log("fetch.giveup", url=link_url, status=status, attempts=3)
 
-            tasks = []
-            for link in links:
-                await sem.acquire()
-                tasks.append(asyncio.create_task(process_link(link)))
-                sem.release()
-            # process sequentially but scheduled, keep minimal complexity
-            for t in tasks:
-                await t
+            # fetch concurrently, bounded by the semaphore held in process_link
+            tasks = [asyncio.create_task(process_link(link)) for link in links]
+            await asyncio.gather(*tasks, return_exceptions=True)
 
+            await self._flush_articles()
+            await self._flush_writes()
             await self._log("site.complete", url=base_url)
         except Exception as e:
             await self._log("site.exception", url=base_url, error=str(e))
+            try:
+                await self._flush_articles()
+            except Exception:
+                pass
 
-    async def _process_page(self, url: str, html: Optional[str] = None):
-        """Process and classify a single page"""
+    async def _process_page(self, url: str, html_bytes: bytes, noindex: bool = False):
+        """Process and classify a single already-fetched page"""
+        claimed = None
         try:
-            # Extract clean text (avoid network fetch if html provided)
-            if html is None:
-                downloaded = await asyncio.to_thread(trafilatura.fetch_url, url)
-            else:
-                downloaded = html
-            if not downloaded:
+            # meta robots flag is pre-extracted by the caller's parse
+            if noindex:
+                await self._log("robots.meta-skip", url=url)
+                return
+
+            if not html_bytes:
                 await self._log("extract.skip", url=url, reason="no-content")
                 return
 
-            text = await asyncio.to_thread(trafilatura.extract, downloaded)
+            # skip extract/classify/save for content we've already stored
+            digest = hashlib.sha1(html_bytes).digest()
+            # copies within this crawl aren't in seen_hashes until their batch lands
+            if digest in self._pending_digests:
+                await self._log("extract.skip", url=url, reason="duplicate")
+                return
+            self._pending_digests.add(digest)
+            claimed = digest
+            if await self.db.hash_exists(digest):
+                await self._log("extract.skip", url=url, reason="duplicate")
+                return
+
+            # trafilatura is CPU-bound pure Python; a process pool lets
+            # concurrent pages extract in parallel instead of contending on the GIL.
+            # Raw bytes let its lxml parser decode directly.
+            text = await self._extract(html_bytes)
             if not text or len(text) < 500:  # Skip short pages
                 await self._log("extract.skip", url=url, reason="too-short")
                 return
             
             # Detect language
             try:
-                lang = detect(text)
+                # CLD3 on the first ~2 KB; langdetect only when CLD3 is unsure
+                res = self._langid.FindLanguage(text=text[:2000])
+                lang = res.language if res.is_reliable else detect(text)
                 if lang != 'en':
                     await self._log("extract.skip", url=url, reason="non-english", lang=lang)
                     return  # Skip non-English content
@@ -255,84 +439,134 @@ class WebCrawler:
             topic = self._classify_topic(text, url) or "general"
             
             # Save to database
-            await self.db.save_article(url, text, topic)
+            self._article_buffer.append((url, text, topic))
+            self._hash_buffer.append(digest)
+            claimed = None  # released by _write_articles
+            if len(self._article_buffer) >= self.article_batch_size:
+                self._flush_articles_soon()
             await self._log("page.saved", url=url, topic=topic)
             
             # Save to file
-            await self._save_to_file(url, text, topic)
+            await self._save_to_file(url, text, topic, urlparse(url))
             
         except Exception as e:
             await self._log("page.exception", url=url, error=str(e))
+        finally:
+            if claimed is not None:
+                self._pending_digests.discard(claimed)
 
     def _classify_topic(self, text: str, url: str) -> Optional[str]:
         """Classify content into topic categories"""
+        # the stock pyahocorasick wheel only accepts str keys, so a single
+        # str.lower() (ASCII fast path in CPython) is the cheapest fold here
         text_lower = text.lower()
         url_lower = url.lower()
         
-        # Score each topic
-        topic_scores = {}
-        for topic, keywords in self.topic_mapping.items():
-            score = 0
-            for keyword in keywords:
-                score += text_lower.count(keyword)
-                score += url_lower.count(keyword) * 2  # URL keywords are more important
-            topic_scores[topic] = score
+        # Score each topic id in a single pass over text and url
+        topic_scores = array('I', [0]) * len(self.TOPICS)
+        for _, topic_ids in self._KEYWORD_AUTOMATON.iter(text_lower):
+            for topic_id in topic_ids:
+                topic_scores[topic_id] += 1
+        for _, topic_ids in self._KEYWORD_AUTOMATON.iter(url_lower):
+            for topic_id in topic_ids:
+                topic_scores[topic_id] += 2  # URL keywords are more important
         
         # Return topic with highest score (if above threshold)
         if topic_scores:
-            best_topic = max(topic_scores, key=topic_scores.get)
-            if topic_scores[best_topic] > 2:  # Minimum threshold
-                return best_topic
+            best_id = max(range(len(topic_scores)), key=topic_scores.__getitem__)
+            if topic_scores[best_id] > 2:  # Minimum threshold
+                return self.TOPICS[best_id]
         
         return None
 
-    async def _save_to_file(self, url: str, content: str, topic: str):
-        """Save content to organized file structure"""
-        # Create topic directory
-        topic_dir = os.path.join(self.storage_path, topic)
-        os.makedirs(topic_dir, exist_ok=True)
-        
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        domain = url.split("//")[1].split("/")[0].replace(".", "_")
-        filename = f"{timestamp}_{domain}.md"
-        
-        # Create content with metadata
-        file_content = f"""# {url}
-
-**Source:** {url}
-**Topic:** {topic}
-**Crawled:** {datetime.now().isoformat()}
-
----
-
-{content}
-"""
-        
-        # Save file
-        file_path = os.path.join(topic_dir, filename)
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-            await f.write(file_content)
-
-    async def _get_progress(self):
+    async def _save_to_file(self, url: str, content: str, topic: str, parsed: ParseResult):
+        """Queue content for the topic's next NDJSON shard"""
+        record = json.dumps({
+            "url": url,
+            "domain": parsed.netloc,
+            "topic": topic,
+            "ts": datetime.now().isoformat(),
+            "text": content,
+        }) + "\n"
+        data = record.encode("utf-8")
+        self._pending_writes.setdefault(topic, []).append(data)
+        self._pending_bytes[topic] = self._pending_bytes.get(topic, 0) + len(data)
+        if self._pending_bytes[topic] > self.write_batch_bytes:
+            await self._flush_writes(topic)
+
+    def _flush_articles_soon(self):
+        """Start a batch insert in the background so parsing overlaps the write"""
+        rows, digests = self._take_article_buffers()
+
+        async def flush():
+            try:
+                await self._write_articles(rows, digests)
+            except Exception as e:
+                await self._log("db.exception", error=str(e))
+
+        task = asyncio.create_task(flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_articles(self):
+        """Insert whatever is still buffered and wait for all background inserts"""
+        if self._article_buffer:
+            self._flush_articles_soon()
+        # asyncio.wait, unlike gather, leaves the inserts running if this
+        # caller is cancelled (stop_crawl): their rows are already off the buffer
+        if self._flush_tasks:
+            await asyncio.wait(set(self._flush_tasks))
+
+    def _take_article_buffers(self) -> Tuple[List[Tuple[str, str, str]], List[bytes]]:
+        # swap buffers before any await so pages finishing meanwhile aren't lost
+        rows, self._article_buffer = self._article_buffer, []
+        digests, self._hash_buffer = self._hash_buffer, []
+        return rows, digests
+
+    async def _write_articles(self, rows: List[Tuple[str, str, str]], digests: List[bytes]):
+        try:
+            async with self.db.write_slot() as conn:
+                await self.db.save_articles_bulk(rows, conn=conn)
+                await self.db.save_hashes(digests, conn=conn)
+        finally:
+            # stored now (or lost, so a later crawl may retry them)
+            self._pending_digests.difference_update(digests)
+
+    async def _flush_writes(self, topic: Optional[str] = None):
+        """Write pending records as one NDJSON shard per topic directory"""
+        topics = [topic] if topic else list(self._pending_writes)
+        for t in topics:
+            chunks = self._pending_writes.pop(t, None)
+            self._pending_bytes.pop(t, None)
+            if not chunks:
+                continue
+            topic_dir = os.path.join(self.storage_path, t)
+            os.makedirs(topic_dir, exist_ok=True)
+            filename = f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}.ndjson"
+            async with aiofiles.open(os.path.join(topic_dir, filename), 'wb') as f:
+                await f.write(b"".join(chunks))
+
+    async def _get_progress(self, conn=None):
         """Get current crawl progress"""
         if not self.current_task_id:
             return 0
-        return await self.db.get_crawl_progress(self.current_task_id)
+        return await self.db.get_crawl_progress(self.current_task_id, conn=conn)
 
-    async def _get_sites_crawled(self):
+    async def _get_sites_crawled(self, conn=None):
         """Get number of sites crawled"""
-        return await self.db.get_sites_crawled()
+        return await self.db.get_sites_crawled(conn=conn)
 
-    async def _get_pages_found(self):
+    async def _get_pages_found(self, conn=None):
         """Get total pages found"""
-        return await self.db.get_total_articles()
+        return await self.db.get_total_articles(conn=conn)
 
-    async def _get_last_update(self):
+    async def _get_last_update(self, conn=None):
         """Get last update timestamp"""
-        return await self.db.get_last_update()
+        return await self.db.get_last_update(conn=conn)
 
     async def _log(self, event_type: str, **data):
+        if event_type in DEBUG_EVENTS and not log_manager.enabled_for(logging.DEBUG):
+            return
         await log_manager.publish({
             "type": event_type,
             "task_id": self.current_task_id,
@@ -342,7 +576,13 @@ class WebCrawler:
     async def _get_client(self) -> httpx.AsyncClient:
         if not self._client:
             self._client = httpx.AsyncClient(
-                timeout=self.timeout,
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=200,
+                    max_keepalive_connections=50,
+                    keepalive_expiry=30,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
                 headers={
                     "User-Agent": self.user_agent,
                     "Accept": "text/html,application/xhtml+xml",
@@ -352,45 +592,139 @@ class WebCrawler:
             )
         return self._client
 
+    def _get_extract_pool(self) -> ProcessPoolExecutor:
+        if not self._extract_pool:
+            # forkserver: forking this already-threaded process (uvicorn,
+            # Dramatiq worker threads) can deadlock children on inherited locks
+            self._extract_pool = ProcessPoolExecutor(
+                max_workers=self.extract_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return self._extract_pool
+
+    async def _extract(self, html_bytes: bytes) -> Optional[str]:
+        """Run trafilatura in the process pool, replacing the pool if a worker died"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_extract_pool()
+        try:
+            return await loop.run_in_executor(pool, trafilatura.extract, html_bytes)
+        except BrokenProcessPool:
+            # a killed worker (OOM, segfault) breaks the executor for good;
+            # concurrent callers see the same pool, so only the first replaces it
+            if self._extract_pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._extract_pool = None
+                await self._log("extract.pool-restart")
+            return await loop.run_in_executor(self._get_extract_pool(), trafilatura.extract, html_bytes)
+
+    async def _read_body(self, resp: httpx.Response, limit: Optional[int] = None,
+                         truncate: bool = False) -> Optional[str]:
+        """Read and decode a streamed body, see _read_bytes"""
+        body = await self._read_bytes(resp, limit, truncate)
+        if body is None:
+            return None
+        return body.decode(resp.charset_encoding or "utf-8", errors="replace")
+
+    async def _read_bytes(self, resp: httpx.Response, limit: Optional[int] = None,
+                          truncate: bool = False) -> Optional[bytes]:
+        """Read a streamed body, aborting (or truncating) once it exceeds limit"""
+        limit = limit or self.max_content_length
+        chunks = []
+        total = 0
+        async for chunk in resp.aiter_bytes(65536):
+            total += len(chunk)
+            if total > limit:
+                if not truncate:
+                    return None
+                chunks.append(chunk[: len(chunk) - (total - limit)])
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
     async def _get_robots(self, base_url: str) -> Optional[robotparser.RobotFileParser]:
         if not self.respect_robots:
             return None
         parsed = urlparse(base_url)
         netloc = parsed.netloc
-        if netloc in self._robots_cache:
-            return self._robots_cache[netloc]
-        rp = robotparser.RobotFileParser()
+        cached = self._robots_cache.get(netloc)
+        if cached and time.time() - cached[1] < self.robots_ttl:
+            return cached[0]
+
+        # revalidate an expired policy with a conditional GET
+        headers = {}
+        if cached:
+            if cached[2]:
+                headers["If-None-Match"] = cached[2]
+            if cached[3]:
+                headers["If-Modified-Since"] = cached[3]
+
         robots_url = f"{parsed.scheme}://{netloc}/robots.txt"
         try:
             client = await self._get_client()
-            resp = await client.get(robots_url)
-            if resp.status_code >= 400:
-                rp.parse("")
-            else:
-                rp.parse(resp.text.splitlines())
+            async with client.stream("GET", robots_url, headers=headers) as resp:
+                if resp.status_code == 304 and cached:
+                    self._robots_cache[netloc] = (cached[0], time.time(), cached[2], cached[3], cached[4])
+                    return cached[0]
+                if resp.status_code >= 500:
+                    # unreachable (RFC 9309): don't cache, retry on the next lookup
+                    return cached[0] if cached else self._disallow_robots()
+                rp = robotparser.RobotFileParser()
+                body = ""
+                if resp.status_code < 400:
+                    body = await self._read_body(resp, self.robots_max_bytes, truncate=True) or ""
+                rp.parse(body.splitlines())
+                etag = resp.headers.get("etag", "")
+                last_modified = resp.headers.get("last-modified", "")
         except Exception:
-            rp.parse("")
-        self._robots_cache[netloc] = rp
+            return cached[0] if cached else self._disallow_robots()
+        self._robots_cache[netloc] = (rp, time.time(), etag, last_modified, body)
         return rp
 
-    def _is_safe_url(self, url: str, base_netloc: str) -> bool:
+    def _load_robots_cache(self):
+        """Hydrate the robots cache from disk so restarts skip re-fetching"""
+        try:
+            with open(self._robots_cache_path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for netloc, entry in entries.items():
+            rp = robotparser.RobotFileParser()
+            rp.parse(entry.get("text", "").splitlines())
+            self._robots_cache[netloc] = (
+                rp,
+                float(entry.get("fetched_at", 0)),
+                entry.get("etag", ""),
+                entry.get("last_modified", ""),
+                entry.get("text", ""),
+            )
+
+    def _save_robots_cache(self):
+        """Persist the robots cache (raw text + metadata) under storage_path"""
+        entries = {
+            netloc: {"text": text, "fetched_at": fetched_at, "etag": etag, "last_modified": last_modified}
+            for netloc, (_, fetched_at, etag, last_modified, text) in self._robots_cache.items()
+        }
+        os.makedirs(self.storage_path, exist_ok=True)
+        tmp_path = self._robots_cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self._robots_cache_path)
+
+    def _disallow_robots(self) -> robotparser.RobotFileParser:
+        """Policy for an unreachable robots.txt: RFC 9309 says assume full disallow"""
+        rp = robotparser.RobotFileParser()
+        rp.disallow_all = True
+        rp.modified()
+        return rp
+
+    def _is_safe_url(self, url: str, base_netloc_l: str) -> bool:
+        """base_netloc_l must already be lowercased"""
         try:
             p = urlparse(url)
             if p.scheme not in ("http", "https"):
                 return False
-            host = p.hostname or ""
-            host_l = host.lower()
-            if host_l in {"localhost", "127.0.0.1"} or host_l.endswith(".local"):
-                return False
-            try:
-                ip = ipaddress.ip_address(host_l)
-                if ip.is_private or ip.is_loopback:
-                    return False
-            except ValueError:
-                # not an IP literal
-                pass
-            # same-domain (allow subdomains)
-            return host_l == base_netloc.lower() or host_l.endswith("." + base_netloc.lower())
+            # urlparse already lowercases hostname
+            return _host_ok(p.hostname or "", base_netloc_l)
         except Exception:
             return False
 
@@ -402,7 +736,7 @@ class WebCrawler:
         except Exception:
             return False
 
-    async def _sleep_with_delay(self, rp: Optional[robotparser.RobotFileParser]):
+    def _crawl_delay(self, rp: Optional[robotparser.RobotFileParser]) -> float:
         base = self.delay_seconds
         try:
             if rp is not None:
@@ -411,4 +745,36 @@ class WebCrawler:
                     base = max(base, float(cd))
         except Exception:
             pass
-        await asyncio.sleep(base + random.uniform(0, 0.5))
+        return base + random.uniform(0, 0.5)
+
+    def _retry_delay(self, retry_after: Optional[str], default: float) -> float:
+        """Seconds to wait before retrying, honouring Retry-After (capped at 60s)"""
+        delay = default
+        if retry_after:
+            retry_after = retry_after.strip()
+            if retry_after.isdigit():
+                delay = float(retry_after)
+            else:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    delay = max(0.0, when.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return min(delay, 60.0)
+
+    async def _wait_for_host(self, netloc: str, rp: Optional[robotparser.RobotFileParser]):
+        """Space out requests to the same host by its crawl delay; other hosts stay parallel"""
+        async with self._host_gates.setdefault(netloc, asyncio.Lock()):
+            loop = asyncio.get_running_loop()
+            # re-check after sleeping: a 429/503 may have pushed the slot back
+            wait = self._host_next_time.get(netloc, 0.0) - loop.time()
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self._host_next_time.get(netloc, 0.0) - loop.time()
+            self._host_next_time[netloc] = loop.time() + self._crawl_delay(rp)
+
+    def _defer_host(self, netloc: str, delay: float):
+        """Push the host's next request slot at least `delay` seconds out"""
+        until = asyncio.get_running_loop().time() + delay
+        if until > self._host_next_time.get(netloc, 0.0):
+            self._host_next_time[netloc] = until
@@ -1,187 +1,354 @@
+import asyncio
+import contextlib
 import asyncpg
 import os
 import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from cache_utils import stats_cache, topics_cache
+from logging_utils import log_manager
+
+# Hot read queries; asyncpg's statement cache prepares each once per connection
+HOT_QUERIES = {
+    "statistics": """
+        SELECT
+            (SELECT COUNT(*) FROM articles) AS total_articles,
+            (SELECT COUNT(*) FROM (SELECT 1 FROM articles GROUP BY topic) t) AS topics_covered,
+            (SELECT COUNT(*) FROM crawl_tasks WHERE status = 'running') AS active_crawlers,
+            (SELECT MAX(created_at) FROM articles) AS last_update
+    """,
+    "total_articles": "SELECT COUNT(*) FROM articles",
+    "last_update": "SELECT MAX(created_at) FROM articles",
+    "crawl_progress": "SELECT progress FROM crawl_tasks WHERE id = $1",
+    "topic_stats": """
+        SELECT topic AS name, COUNT(*) as count, MAX(created_at) as last_update
+        FROM articles 
+        GROUP BY topic 
+        ORDER BY count DESC
+    """,
+    "articles_by_topic": """
+        SELECT url, COALESCE(title, 'Untitled') AS title, created_at FROM articles 
+        WHERE topic = $1 ORDER BY created_at DESC LIMIT 100
+    """,
+    "search_articles": """
+        SELECT url, COALESCE(title, 'Untitled') AS title, topic, created_at FROM articles 
+        WHERE tsv @@ plainto_tsquery('english', $1)
+        ORDER BY created_at DESC LIMIT 50
+    """,
+}
 
 class Database:
     def __init__(self):
         self.database_url = os.getenv("DATABASE_URL")
         self.pool = None
+        # pool sizing follows (cores * 2) + 1 unless overridden
+        self.min_size = int(os.getenv("PG_MIN", "4"))
+        self.max_size = int(os.getenv("PG_MAX", str((os.cpu_count() or 4) * 2 + 1)))
+        # pgbouncer transaction pooling can't keep per-connection statements
+        self.use_prepared = os.getenv("PGBOUNCER", "").lower() != "transaction"
+        self.statement_cache_size = (
+            int(os.getenv("PG_STMT_CACHE", "1024")) if self.use_prepared else 0
+        )
+        # session GUCs sent as startup parameters: applied once per connection
+        # and, unlike SET, kept across the RESET ALL asyncpg runs on release.
+        # pgbouncer rejects unknown startup parameters, so skip them there.
+        self.session_settings = {} if not self.use_prepared else {
+            "jit": "off",
+            "lock_timeout": "2s",
+            "statement_timeout": "30s",
+        }
+        # bounds concurrent article writes so overlapping saves can't exhaust the pool
+        self._save_sem = asyncio.Semaphore(8)
+        # task_id -> latest progress not yet written, see update_crawl_progress
+        self._progress: Dict[str, float] = {}
+        self._progress_task: Optional[asyncio.Task] = None
+        self.progress_flush_delay = 0.25
 
     async def init_db(self):
         """Initialize database connection and tables"""
-        self.pool = await asyncpg.create_pool(self.database_url)
+        self.pool = await asyncpg.create_pool(
+            self.database_url,
+            min_size=min(self.min_size, self.max_size),
+            max_size=self.max_size,
+            max_inactive_connection_lifetime=600,
+            statement_cache_size=self.statement_cache_size,
+            command_timeout=30,
+            server_settings=self.session_settings,
+        )
         
-        async with self.pool.acquire() as conn:
-            # Create tables
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS articles (
-                    id SERIAL PRIMARY KEY,
-                    url TEXT UNIQUE NOT NULL,
-                    title TEXT,
-                    content TEXT NOT NULL,
-                    topic TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                );
-            """)
-            
+        # DDL runs on its own connection: the pool's command_timeout and
+        # lock/statement timeouts would abort a table rewrite or a lock wait
+        conn = await asyncpg.connect(
+            self.database_url, statement_cache_size=self.statement_cache_size
+        )
+        try:
+            async with conn.transaction():
+                await conn.execute("SET LOCAL lock_timeout = 0; SET LOCAL statement_timeout = 0")
+                await self._create_schema(conn)
+        finally:
+            await conn.close()
+
+    async def _create_schema(self, conn):
+        """Create tables and indexes, skipping ALTERs that are already applied"""
+        # Create tables
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id SERIAL PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT,
+                content TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT NOW(),
+                updated_at TIMESTAMP DEFAULT NOW()
+            );
+        """)
+        # ALTER TABLE takes ACCESS EXCLUSIVE even when IF NOT EXISTS makes it
+        # a no-op, so check the catalog first
+        columns = {r["column_name"] for r in await conn.fetch("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'articles'
+        """)}
+
+        # host as a stored generated column so per-site counts can use an index
+        if "host" not in columns:
             await conn.execute("""
-                CREATE TABLE IF NOT EXISTS crawl_tasks (
-                    id TEXT PRIMARY KEY,
-                    status TEXT NOT NULL,
-                    progress FLOAT DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                );
+                ALTER TABLE articles ADD COLUMN IF NOT EXISTS host TEXT
+                    GENERATED ALWAYS AS (SPLIT_PART(url, '/', 3)) STORED;
             """)
-            
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_host ON articles(host);")
+
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_tasks (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                progress FLOAT DEFAULT 0,
+                created_at TIMESTAMP DEFAULT NOW(),
+                updated_at TIMESTAMP DEFAULT NOW()
+            );
+        """)
+
+        # ephemeral counters: UNLOGGED skips WAL (contents are lost on crash)
+        await conn.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS crawl_stats (
+                id SERIAL PRIMARY KEY,
+                metric_name TEXT NOT NULL,
+                metric_value INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT NOW()
+            );
+        """)
+        # tables created by older schemas are still logged; convert them once
+        if await conn.fetchval(
+            "SELECT relpersistence FROM pg_class WHERE oid = 'crawl_stats'::regclass"
+        ) != "u":
+            await conn.execute("ALTER TABLE crawl_stats SET UNLOGGED;")
+
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_hashes (
+                digest BYTEA PRIMARY KEY,
+                created_at TIMESTAMP DEFAULT NOW()
+            );
+        """)
+
+        # precomputed full-text vector; supersedes the per-column
+        # to_tsvector expression indexes older schemas created
+        if "tsv" not in columns:
             await conn.execute("""
-                CREATE TABLE IF NOT EXISTS crawl_stats (
-                    id SERIAL PRIMARY KEY,
-                    metric_name TEXT NOT NULL,
-                    metric_value INTEGER NOT NULL,
-                    updated_at TIMESTAMP DEFAULT NOW()
-                );
+                ALTER TABLE articles ADD COLUMN IF NOT EXISTS tsv TSVECTOR
+                    GENERATED ALWAYS AS (
+                        to_tsvector('english', coalesce(title, '') || ' ' || content)
+                    ) STORED;
             """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_tsv ON articles USING gin(tsv);
+            DROP INDEX IF EXISTS idx_articles_content_search;
+            DROP INDEX IF EXISTS idx_articles_title_search;
+        """)
+
+        # indexes for the hot read paths
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_topic_created
+                ON articles(topic, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_tasks_running
+                ON crawl_tasks(status) WHERE status = 'running';
+        """)
+
+    @contextlib.asynccontextmanager
+    async def _acquire(self, conn=None):
+        """Use the caller's connection if given, else borrow one from the pool"""
+        if conn is not None:
+            yield conn
+        else:
+            async with self.pool.acquire() as pooled:
+                yield pooled
 
-    async def get_statistics(self):
+    @contextlib.asynccontextmanager
+    async def write_slot(self, conn=None):
+        """Borrow a connection for article writes, bounded by the write semaphore.
+
+        The semaphore is taken before the pool checkout so queued writers
+        don't hold connections the read paths need. A caller passing its own
+        connection is expected to have got it from here.
+        """
+        if conn is not None:
+            yield conn
+        else:
+            async with self._save_sem, self.pool.acquire() as pooled:
+                yield pooled
+
+    async def get_statistics(self, *, conn=None):
         """Get dashboard statistics"""
-        async with self.pool.acquire() as conn:
-            total_articles = await conn.fetchval("SELECT COUNT(*) FROM articles")
-            topics_covered = await conn.fetchval("SELECT COUNT(DISTINCT topic) FROM articles")
-            
-            # Active crawlers (tasks in running state)
-            active_crawlers = await conn.fetchval(
-                "SELECT COUNT(*) FROM crawl_tasks WHERE status = 'running'"
-            )
-            
-            # Last update
-            last_update = await conn.fetchval(
-                "SELECT MAX(created_at) FROM articles"
-            )
+        async with self._acquire(conn) as conn:
+            # all four scalars in one round trip
+            row = await conn.fetchrow(HOT_QUERIES["statistics"])
+            last_update = row["last_update"]
             
             return {
-                "total_articles": total_articles or 0,
-                "active_crawlers": active_crawlers or 0,
-                "topics_covered": topics_covered or 0,
+                "total_articles": row["total_articles"] or 0,
+                "active_crawlers": row["active_crawlers"] or 0,
+                "topics_covered": row["topics_covered"] or 0,
                 "last_update": last_update.isoformat() if last_update else "Never"
             }
 
-    async def get_topic_stats(self):
+    async def get_topic_stats(self, *, conn=None):
         """Get statistics by topic"""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT topic, COUNT(*) as count, MAX(created_at) as last_update
-                FROM articles 
-                GROUP BY topic 
-                ORDER BY count DESC
-            """)
-            
-            return [
-                {
-                    "name": row["topic"],
-                    "count": row["count"],
-                    "last_update": row["last_update"].isoformat() if row["last_update"] else None
-                }
-                for row in rows
-            ]
-
-    async def save_article(self, url: str, content: str, topic: str):
-        """Save an article to the database"""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO articles (url, content, topic) 
-                VALUES ($1, $2, $3)
-                ON CONFLICT (url) DO UPDATE SET
-                    content = EXCLUDED.content,
-                    topic = EXCLUDED.topic,
-                    updated_at = NOW()
-            """, url, content, topic)
-
-    async def create_crawl_task(self, task_id: str, status: str):
+        async with self._acquire(conn) as conn:
+            # rows are shaped in SQL; main.py turns the Records into dicts for orjson
+            return await conn.fetch(HOT_QUERIES["topic_stats"])
+
+    def _invalidate_caches(self):
+        """Let new articles surface on the dashboard before the TTL expires"""
+        stats_cache.invalidate()
+        topics_cache.invalidate()
+
+    async def save_articles_bulk(self, rows: List[Tuple[str, str, str]], *, conn=None):
+        """Save many (url, content, topic) rows via COPY into a staging table"""
+        if not rows:
+            return
+        async with self.write_slot(conn) as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    CREATE TEMP TABLE articles_staging (
+                        url TEXT, content TEXT, topic TEXT
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table(
+                    "articles_staging", records=rows, columns=["url", "content", "topic"]
+                )
+                # DISTINCT ON: a url may appear twice in one batch, which
+                # ON CONFLICT DO UPDATE rejects within a single statement
+                await conn.execute("""
+                    INSERT INTO articles (url, content, topic)
+                    SELECT DISTINCT ON (url) url, content, topic FROM articles_staging
+                    ORDER BY url
+                    ON CONFLICT (url) DO UPDATE SET
+                        content = EXCLUDED.content,
+                        topic = EXCLUDED.topic,
+                        updated_at = NOW()
+                """)
+        self._invalidate_caches()
+
+    async def hash_exists(self, digest: bytes, *, conn=None) -> bool:
+        """Check whether page content with this hash was already saved"""
+        async with self._acquire(conn) as conn:
+            return bool(await conn.fetchval(
+                "SELECT 1 FROM seen_hashes WHERE digest = $1", digest
+            ))
+
+    async def save_hashes(self, digests: List[bytes], *, conn=None):
+        """Record the content hashes of saved pages"""
+        async with self._acquire(conn) as conn:
+            await conn.executemany("""
+                INSERT INTO seen_hashes (digest) VALUES ($1)
+                ON CONFLICT (digest) DO NOTHING
+            """, [(d,) for d in digests])
+
+    async def create_crawl_task(self, task_id: str, status: str, *, conn=None):
         """Create a new crawl task"""
-        async with self.pool.acquire() as conn:
+        async with self._acquire(conn) as conn:
             await conn.execute("""
                 INSERT INTO crawl_tasks (id, status) VALUES ($1, $2)
             """, task_id, status)
 
-    async def update_crawl_task(self, task_id: str, status: str):
-        """Update crawl task status"""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                UPDATE crawl_tasks SET status = $2, updated_at = NOW() 
-                WHERE id = $1
-            """, task_id, status)
+    async def update_crawl_task(self, task_id: str, status: str, *, conn=None):
+        """Update crawl task status, together with any progress not yet flushed"""
+        # let an in-flight flush land first so it can't overwrite the final value
+        if self._progress_task is not None and not self._progress_task.done():
+            await self._progress_task
+        progress = self._progress.pop(task_id, None)
+        async with self._acquire(conn) as conn:
+            if progress is None:
+                await conn.execute("""
+                    UPDATE crawl_tasks SET status = $2, updated_at = NOW() 
+                    WHERE id = $1
+                """, task_id, status)
+            else:
+                await conn.execute("""
+                    UPDATE crawl_tasks SET status = $2, progress = $3, updated_at = NOW() 
+                    WHERE id = $1
+                """, task_id, status, progress)
+        # active_crawlers is part of the cached dashboard stats
+        stats_cache.invalidate()
 
     async def update_crawl_progress(self, task_id: str, progress: float):
-        """Update crawl progress"""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                UPDATE crawl_tasks SET progress = $2, updated_at = NOW() 
-                WHERE id = $1
-            """, task_id, progress)
+        """Record crawl progress; writes are coalesced and flushed in the background"""
+        self._progress[task_id] = progress
+        if self._progress_task is None or self._progress_task.done():
+            self._progress_task = asyncio.create_task(self._flush_progress_soon())
+
+    async def _flush_progress_soon(self):
+        """Write the latest progress of every task in one round trip"""
+        # loop so updates arriving during a write are picked up by this task
+        while True:
+            await asyncio.sleep(self.progress_flush_delay)
+            pending, self._progress = self._progress, {}
+            if not pending:
+                return
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.executemany("""
+                        UPDATE crawl_tasks SET progress = $2, updated_at = NOW() 
+                        WHERE id = $1
+                    """, list(pending.items()))
+            except Exception as e:
+                # keep the values for the next flush; newer updates win
+                for task_id, progress in pending.items():
+                    self._progress.setdefault(task_id, progress)
+                await log_manager.publish({"type": "db.exception", "error": str(e)})
+                return
 
-    async def get_crawl_progress(self, task_id: str):
+    async def get_crawl_progress(self, task_id: str, *, conn=None):
         """Get crawl progress"""
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval(
-                "SELECT progress FROM crawl_tasks WHERE id = $1", task_id
-            ) or 0
+        if task_id in self._progress:
+            return self._progress[task_id]
+        async with self._acquire(conn) as conn:
+            return await conn.fetchval(HOT_QUERIES["crawl_progress"], task_id) or 0
 
-    async def get_articles_by_topic(self, topic: str):
+    async def get_articles_by_topic(self, topic: str, *, conn=None):
         """Get articles for a specific topic"""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT url, title, created_at FROM articles 
-                WHERE topic = $1 ORDER BY created_at DESC LIMIT 100
-            """, topic)
-            
-            return [
-                {
-                    "url": row["url"],
-                    "title": row["title"] or "Untitled",
-                    "created_at": row["created_at"].isoformat()
-                }
-                for row in rows
-            ]
-
-    async def search_articles(self, query: str):
+        async with self._acquire(conn) as conn:
+            return await conn.fetch(HOT_QUERIES["articles_by_topic"], topic)
+
+    async def search_articles(self, query: str, *, conn=None):
         """Search articles by content"""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT url, title, topic, created_at FROM articles 
-                WHERE content ILIKE $1 OR title ILIKE $1
-                ORDER BY created_at DESC LIMIT 50
-            """, f"%{query}%")
-            
-            return [
-                {
-                    "url": row["url"],
-                    "title": row["title"] or "Untitled",
-                    "topic": row["topic"],
-                    "created_at": row["created_at"].isoformat()
-                }
-                for row in rows
-            ]
-
-    async def get_sites_crawled(self):
+        async with self._acquire(conn) as conn:
+            return await conn.fetch(HOT_QUERIES["search_articles"], query)
+
+    async def get_sites_crawled(self, *, conn=None):
         """Get number of unique sites crawled"""
-        async with self.pool.acquire() as conn:
+        async with self._acquire(conn) as conn:
             return await conn.fetchval("""
-                SELECT COUNT(DISTINCT SPLIT_PART(url, '/', 3)) FROM articles
+                SELECT COUNT(*) FROM (SELECT 1 FROM articles GROUP BY host) h
             """) or 0
 
-    async def get_total_articles(self):
+    async def get_total_articles(self, *, conn=None):
         """Get total number of articles"""
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval("SELECT COUNT(*) FROM articles") or 0
+        async with self._acquire(conn) as conn:
+            return await conn.fetchval(HOT_QUERIES["total_articles"]) or 0
 
-    async def get_last_update(self):
+    async def get_last_update(self, *, conn=None):
         """Get last update timestamp"""
-        async with self.pool.acquire() as conn:
-            last_update = await conn.fetchval("SELECT MAX(created_at) FROM articles")
+        async with self._acquire(conn) as conn:
+            last_update = await conn.fetchval(HOT_QUERIES["last_update"])
             if last_update:
                 return last_update.isoformat()
             return "Never"
\ No newline at end of file
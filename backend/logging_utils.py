@@ -1,45 +1,63 @@
 import asyncio
-import json
+import itertools
+import logging
+import os
+import orjson
 from datetime import datetime
-from typing import Any, Dict, List
+from collections import deque
+from typing import Any, Deque, Dict, Set, Tuple
 
 class LogManager:
     """In-memory async pub/sub logger for streaming crawl events to clients."""
     def __init__(self):
-        self.subscribers: List[asyncio.Queue] = []
-        self.buffer: List[Dict[str, Any]] = []  # recent logs buffer
+        self.subscribers: Set[asyncio.Queue] = set()
         self.max_buffer = 500
+        self.max_queue = 1024  # per-subscriber backlog before old events are dropped
+        # recent logs ring of (event, serialized JSON payload); O(1) eviction
+        self.buffer: Deque[Tuple[Dict[str, Any], bytes]] = deque(maxlen=self.max_buffer)
+        self.level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
 
-    def _append_buffer(self, event: Dict[str, Any]):
-        self.buffer.append(event)
-        if len(self.buffer) > self.max_buffer:
-            self.buffer.pop(0)
+    def enabled_for(self, level: int) -> bool:
+        return self.level <= level
 
     async def subscribe(self) -> asyncio.Queue:
-        q: asyncio.Queue = asyncio.Queue()
-        self.subscribers.append(q)
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self.subscribers.add(q)
         return q
 
     async def unsubscribe(self, q: asyncio.Queue):
-        if q in self.subscribers:
-            self.subscribers.remove(q)
+        self.subscribers.discard(q)
 
     async def publish(self, event: Dict[str, Any]):
         # add timestamp if missing
         event.setdefault("ts", datetime.utcnow().isoformat() + "Z")
-        self._append_buffer(event)
-        # fan-out (don't await put for each to avoid head-of-line blocking)
-        for q in list(self.subscribers):
+        # serialize once; every subscriber receives the same bytes
+        payload = orjson.dumps(event)
+        self.buffer.append((event, payload))
+        # fan-out (don't await put for each to avoid head-of-line blocking);
+        # iterate the set directly and prune broken queues afterwards
+        dead = []
+        for q in self.subscribers:
             try:
-                q.put_nowait(event)
-            except Exception:
-                # drop slow/broken subscribers
+                q.put_nowait(payload)
+            except asyncio.QueueFull:
+                # slow subscriber: drop its oldest event to make room
                 try:
-                    self.subscribers.remove(q)
-                except ValueError:
+                    q.get_nowait()
+                    q.put_nowait(payload)
+                except (asyncio.QueueEmpty, asyncio.QueueFull):
                     pass
+            except Exception:
+                # drop broken subscribers
+                dead.append(q)
+        for q in dead:
+            self.subscribers.discard(q)
+
+    def _tail(self, n: int):
+        return itertools.islice(self.buffer, max(0, len(self.buffer) - n), len(self.buffer))
 
-    def recent(self, n: int = 100) -> List[Dict[str, Any]]:
-        return self.buffer[-n:]
+    def recent_payload(self, n: int = 100) -> bytes:
+        """JSON body {"logs": [...]} assembled from the pre-serialized events"""
+        return b'{"logs":[' + b",".join(payload for _, payload in self._tail(n)) + b"]}"
 
 log_manager = LogManager()
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 import asyncio
 import aiofiles
 import os
@@ -11,8 +11,15 @@ from crawler import WebCrawler
 from database import Database
 from models import CrawlTask, CrawlStatus, TopicStats
 from logging_utils import log_manager
+from cache_utils import stats_cache, topics_cache
 
-app = FastAPI(title="ServerAI Knowledge Engine API", version="1.0.0")
+# handlers returning plain dicts still go through jsonable_encoder first;
+# the row endpoints below bypass it by building the ORJSONResponse themselves
+app = FastAPI(
+    title="ServerAI Knowledge Engine API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -26,6 +33,8 @@ app.add_middleware(
 # Initialize components
 db = Database()
 crawler = WebCrawler()
+# share the initialised pool so crawler writes invalidate this process's caches
+crawler.db = db
 
 @app.on_event("startup")
 async def startup_event():
@@ -38,7 +47,7 @@ async def root():
 @app.get("/api/stats")
 async def get_stats():
     """Get dashboard statistics"""
-    stats = await db.get_statistics()
+    stats = await stats_cache.get(db.get_statistics)
     return {
         "total_articles": stats.get("total_articles", 0),
         "active_crawlers": stats.get("active_crawlers", 0),
@@ -49,8 +58,8 @@ async def get_stats():
 @app.get("/api/topics")
 async def get_topics():
     """Get topic statistics"""
-    topics = await db.get_topic_stats()
-    return topics
+    topics = await topics_cache.get(db.get_topic_stats)
+    return ORJSONResponse([dict(r) for r in topics])
 
 @app.get("/api/crawler/status")
 async def get_crawler_status():
@@ -75,19 +84,19 @@ async def stop_crawler():
 async def get_articles_by_topic(topic: str):
     """Get articles for a specific topic"""
     articles = await db.get_articles_by_topic(topic)
-    return articles
+    return ORJSONResponse([dict(r) for r in articles])
 
 @app.get("/api/search")
 async def search_articles(q: str):
     """Search articles by query"""
     results = await db.search_articles(q)
-    return results
+    return ORJSONResponse([dict(r) for r in results])
 
 @app.get("/api/logs/recent")
 async def recent_logs(n: int = 100):
     """Return recent crawl logs (for fallback / initial load)"""
     n = max(1, min(1000, n))
-    return {"logs": log_manager.recent(n)}
+    return Response(content=log_manager.recent_payload(n), media_type="application/json")
 
 @app.websocket("/api/logs/stream")
 async def logs_stream(ws: WebSocket):
@@ -97,9 +106,9 @@ async def logs_stream(ws: WebSocket):
         # send a hello event
         await ws.send_json({"type": "hello", "ts": datetime.utcnow().isoformat() + "Z"})
         while True:
-            # don't expect incoming data; only push
-            event = await q.get()
-            await ws.send_json(event)
+            # don't expect incoming data; only push (already JSON-encoded)
+            payload = await q.get()
+            await ws.send_text(payload.decode())
     except WebSocketDisconnect:
         pass
     finally:
@@ -107,4 +116,4 @@ async def logs_stream(ws: WebSocket):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
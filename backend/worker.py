@@ -1,35 +1,34 @@
 import asyncio
 import os
-from celery import Celery
+import uvloop
+import dramatiq
+from dramatiq.asyncio import get_event_loop_thread
+from dramatiq.brokers.redis import RedisBroker
+from dramatiq.middleware import AsyncIO
 from crawler import WebCrawler
 from database import Database
 
-# Initialize Celery
-celery_app = Celery(
-    'serverai_worker',
-    broker=os.getenv('REDIS_URL', 'redis://redis:6379'),
-    backend=os.getenv('REDIS_URL', 'redis://redis:6379')
-)
+# The AsyncIO middleware creates its loop after this, so it runs on uvloop
+asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 # Initialize components
 crawler = WebCrawler()
 db = Database()
+crawler.db = db
 
-@celery_app.task
-def crawl_site_task(site_url: str, task_id: str):
-    """Celery task for crawling a single site"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    try:
-        loop.run_until_complete(db.init_db())
-        loop.run_until_complete(crawler._crawl_site(site_url))
-        return f"Successfully crawled {site_url}"
-    except Exception as e:
-        return f"Error crawling {site_url}: {str(e)}"
-    finally:
-        loop.close()
+class DatabasePool(dramatiq.Middleware):
+    """Create the connection pool once per worker process, on the shared loop"""
+    def after_worker_boot(self, broker, worker):
+        get_event_loop_thread().run_coroutine(db.init_db())
 
-if __name__ == "__main__":
-    # Start the worker
-    celery_app.start()
\ No newline at end of file
+# Initialize Dramatiq: one persistent event loop per worker process,
+# actors are native coroutines dispatched onto it
+broker = RedisBroker(url=os.getenv('REDIS_URL', 'redis://redis:6379'))
+broker.add_middleware(AsyncIO())
+broker.add_middleware(DatabasePool())
+dramatiq.set_broker(broker)
+
+@dramatiq.actor(max_retries=0)
+async def crawl_site_task(site_url: str, task_id: str):
+    """Dramatiq actor for crawling a single site"""
+    await crawler._crawl_site(site_url)
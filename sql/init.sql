@@ -8,7 +8,11 @@ CREATE TABLE IF NOT EXISTS articles (
     content TEXT NOT NULL,
     topic TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT NOW(),
-    updated_at TIMESTAMP DEFAULT NOW()
+    updated_at TIMESTAMP DEFAULT NOW(),
+    host TEXT GENERATED ALWAYS AS (SPLIT_PART(url, '/', 3)) STORED,
+    tsv TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(title, '') || ' ' || content)
+    ) STORED
 );
 
 -- Crawl tasks for tracking crawler status
@@ -20,23 +24,31 @@ CREATE TABLE IF NOT EXISTS crawl_tasks (
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
--- Stats table for caching metrics
-CREATE TABLE IF NOT EXISTS crawl_stats (
+-- Stats table for caching metrics (UNLOGGED: ephemeral, skips WAL)
+CREATE UNLOGGED TABLE IF NOT EXISTS crawl_stats (
     id SERIAL PRIMARY KEY,
     metric_name TEXT NOT NULL,
     metric_value INTEGER NOT NULL,
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Content hashes of saved pages, used to skip duplicate extraction
+CREATE TABLE IF NOT EXISTS seen_hashes (
+    digest BYTEA PRIMARY KEY,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_articles_topic ON articles(topic);
 CREATE INDEX IF NOT EXISTS idx_articles_created_at ON articles(created_at);
 CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url);
+CREATE INDEX IF NOT EXISTS idx_articles_host ON articles(host);
 CREATE INDEX IF NOT EXISTS idx_crawl_tasks_status ON crawl_tasks(status);
+CREATE INDEX IF NOT EXISTS idx_articles_topic_created ON articles(topic, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_running ON crawl_tasks(status) WHERE status = 'running';
 
--- Create full-text search index for content
-CREATE INDEX IF NOT EXISTS idx_articles_content_search ON articles USING gin(to_tsvector('english', content));
-CREATE INDEX IF NOT EXISTS idx_articles_title_search ON articles USING gin(to_tsvector('english', title));
+-- Create full-text search index over the precomputed title + content vector
+CREATE INDEX IF NOT EXISTS idx_articles_tsv ON articles USING gin(tsv);
 
 -- Insert some initial data for demo
 INSERT INTO articles (url, title, content, topic) VALUES 